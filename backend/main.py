@@ -2,18 +2,24 @@
 Hybrid Carbon Footprint Tracker - FastAPI Backend
 """
 
-import json
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import select, desc
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import select, desc, update
+import anyio
 import joblib
 import numpy as np
+import orjson
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -25,7 +31,6 @@ from schemas import (
     CalculationResponse, 
     OffsetResponse, 
     OffsetRequest,
-    OffsetRecommendation,
     EntryResponse,
     UserResponse,
     UserCreate,
@@ -48,17 +53,82 @@ from auth import (
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
+# Threadpool size for sync handlers; the AnyIO default of 40 thrashes on CPU-bound work
+THREADPOOL_TOKENS = min(32, (os.cpu_count() or 1) * 2)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-worker startup: size the threadpool, create tables and warm the ML model
+    
+    Emission factors, suggestion rules and the model itself are loaded once at
+    import (the module-level constants below), so this only finishes the setup.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
+    create_tables()
+    warm_ml_model()
+    print("🌍 Hybrid Carbon Footprint Tracker API started!")
+    print(f"📊 Emission factors loaded successfully ({len(_ACTIVITY_NAMES)} activity factors, {len(SUGGESTION_RULES)} suggestion rules)")
+    if ML_MODEL is not None:
+        print("🤖 ML model loaded successfully")
+    else:
+        print("⚠️  ML model not available - using baseline calculations only")
+    yield
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Hybrid Carbon Footprint Tracker",
     description="API for calculating and tracking personal carbon footprints using hybrid rule-based and ML approaches",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add rate limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+class UnhandledExceptionMiddleware:
+    """
+    Turn any unhandled error into a JSON 500 instead of wrapping every handler in try/except
+
+    Plain ASGI rather than @app.middleware("http"): BaseHTTPMiddleware runs
+    every request through an extra task and stream pair.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            # Too late to replace a response that is already on the wire
+            if response_started:
+                raise
+            response = ORJSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": str(exc)}
+            )
+            await response(scope, receive, send)
+
+# Registered before CORSMiddleware so it runs inside it: an app-level
+# exception handler would run in ServerErrorMiddleware, outside CORS, and
+# the browser would see the 500 without Access-Control-Allow-Origin
+app.add_middleware(UnhandledExceptionMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -69,18 +139,90 @@ app.add_middleware(
 )
 
 # Load emission factors
+@lru_cache(maxsize=1)
 def load_emission_factors() -> Dict:
-    """Load emission factors from shared directory"""
+    """Load emission factors from shared directory (cached, see reload_emission_factors)"""
     factors_path = Path(__file__).parent.parent / "shared" / "conversion_factors.json"
     
     if not factors_path.exists():
         raise FileNotFoundError(f"Emission factors not found at {factors_path}")
     
-    with open(factors_path, 'r') as f:
-        return json.load(f)
+    return orjson.loads(factors_path.read_bytes())
+
+# Food factors in InputPayload field order (beef_kg ... fruits_kg; dairy maps to milk)
+_FOOD_ORDER = ("beef", "chicken", "pork", "fish", "milk", "vegetables", "fruits")
+
+RECYCLING_FACTOR = -0.2  # Recycling saves 0.2 kg CO2 per kg recycled
+
+# Detail names of every non-transport activity, in BaselineKey field order
+# (beef_kg ... electronics_items), and each category's slice of that vector
+_ACTIVITY_NAMES = _FOOD_ORDER + (
+    "electricity", "natural_gas", "landfill", "recycling_saving", "clothing", "electronics"
+)
+_CATEGORY_SLICES = (
+    ("food", slice(0, 7)),
+    ("energy", slice(7, 9)),
+    ("waste", slice(9, 11)),
+    ("consumption", slice(11, 13)),
+)
+
+def _bind_emission_factors(factors: Dict):
+    """Flatten emission factors into the module-level scalars used on the /api/calc hot path"""
+    global EMISSION_FACTORS, ELEC_FACTOR, GAS_FACTOR, WASTE_FACTOR, CLOTHING_FACTOR
+    global ELECTRONICS_FACTOR, FOOD_FACTORS, TRANSPORT_FACTORS, ACTIVITY_FACTORS
+    
+    EMISSION_FACTORS = factors
+    ELEC_FACTOR = float(factors["energy"]["electricity_global_avg"]["value"])
+    GAS_FACTOR = float(factors["energy"]["natural_gas"]["value"])
+    WASTE_FACTOR = float(factors["waste"]["municipal_waste"]["value"])
+    CLOTHING_FACTOR = float(factors["consumption"]["clothing"]["value"])
+    ELECTRONICS_FACTOR = float(factors["consumption"]["electronics_smartphone"]["value"])  # Average smartphone as proxy
+    FOOD_FACTORS = {k: float(v["value"]) for k, v in factors["food"].items()}
+    TRANSPORT_FACTORS = {k: float(v["value"]) for k, v in factors["transport"].items()}
+    # Factor per entry of _ACTIVITY_NAMES (electricity uses the global average)
+    ACTIVITY_FACTORS = np.array(
+        [FOOD_FACTORS[k] for k in _FOOD_ORDER] + [
+            ELEC_FACTOR, GAS_FACTOR,
+            WASTE_FACTOR, RECYCLING_FACTOR,
+            CLOTHING_FACTOR, ELECTRONICS_FACTOR
+        ],
+        dtype=np.float64
+    )
+
+def reload_emission_factors() -> Dict:
+    """Re-read emission factors from disk, rebind derived factors and drop cached results"""
+    load_emission_factors.cache_clear()
+    _bind_emission_factors(load_emission_factors())
+    _calc_core.cache_clear()
+    _calc_body_prefix.cache_clear()
+    return EMISSION_FACTORS
 
 # Global emission factors
-EMISSION_FACTORS = load_emission_factors()
+_bind_emission_factors(load_emission_factors())
+
+# Load suggestion rules
+def load_suggestion_rules() -> Dict:
+    """Load suggestion rules from shared directory (safe fallback if missing)"""
+    rules_path = Path(__file__).parent.parent / "shared" / "suggestion_rules.json"
+    
+    if rules_path.exists():
+        return orjson.loads(rules_path.read_bytes())
+    
+    # Minimal defaults if rules file is not present
+    return {
+        "energy": {"threshold": 0.25, "tips": [{"tip": "Improve home insulation and switch to LEDs", "savings": 15.0, "impact_level": "high"}]},
+        "transport": {"threshold": 0.3, "tips": [{"tip": "Carpool or use public transport twice a week", "savings": 12.0, "impact_level": "medium"}]},
+        "food": {"threshold": 0.2, "tips": [{"tip": "Try one vegetarian day per week", "savings": 8.0, "impact_level": "low"}]}
+    }
+
+# Global suggestion rules
+SUGGESTION_RULES = load_suggestion_rules()
+
+# Rule lookup arrays: category -> row, per-row threshold and best tip
+# (the first tip of each category is usually the highest impact)
+RULE_INDEX: Dict[str, int] = {category: i for i, category in enumerate(SUGGESTION_RULES)}
+RULE_THRESHOLDS = np.array([rule["threshold"] for rule in SUGGESTION_RULES.values()], dtype=np.float64)
+RULE_TIPS = [rule["tips"][0] for rule in SUGGESTION_RULES.values()]
 
 # Load ML model
 def load_ml_model():
@@ -92,7 +234,8 @@ def load_ml_model():
         return None
     
     try:
-        model = joblib.load(model_path)
+        # Memory-map the model's arrays so pages are shared between workers
+        model = joblib.load(model_path, mmap_mode="r")
         print("✅ ML model loaded successfully")
         return model
     except Exception as e:
@@ -102,6 +245,87 @@ def load_ml_model():
 # Global ML model
 ML_MODEL = load_ml_model()
 
+def build_fast_predictor(model):
+    """
+    Compile a fitted estimator into a plain NumPy predict function
+    
+    Skips scikit-learn's per-call input validation and dispatch, which dominates
+    the cost of predicting a single sample. Supports single-output linear
+    regressors (LinearRegression, Ridge, Lasso, ElasticNet) and
+    RandomForestRegressor / ExtraTreesRegressor, fitted on the 3 model features.
+    Other ensembles (AdaBoost's weighted median, Bagging's feature subsets, ...)
+    do not predict as a plain mean of their trees and are left to model.predict.
+    
+    Returns:
+        Callable (house_size, occupants, ac_hours) -> float, or None if the
+        estimator type is not supported
+    """
+    if model is None or getattr(model, "n_features_in_", None) != 3:
+        return None
+    
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+    from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge
+    
+    if isinstance(model, (LinearRegression, Ridge, Lasso, ElasticNet)):
+        if np.ndim(model.coef_) != 1:
+            return None
+        w0, w1, w2 = (float(w) for w in model.coef_)
+        b = float(model.intercept_)
+        
+        def predict_linear(house_size, occupants, ac_hours):
+            return house_size * w0 + occupants * w1 + ac_hours * w2 + b
+        
+        return predict_linear
+    
+    if not isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)) or model.n_outputs_ != 1:
+        return None
+    trees = [est.tree_ for est in model.estimators_]
+    
+    # Pack every tree into padded (n_trees, max_nodes) arrays; leaves point back
+    # at themselves so all trees can be stepped in lockstep for max_depth levels
+    n_trees = len(trees)
+    max_nodes = max(tree.node_count for tree in trees)
+    max_depth = max(tree.max_depth for tree in trees)
+    left = np.zeros((n_trees, max_nodes), dtype=np.intp)
+    right = np.zeros((n_trees, max_nodes), dtype=np.intp)
+    feature = np.zeros((n_trees, max_nodes), dtype=np.intp)
+    threshold = np.zeros((n_trees, max_nodes), dtype=np.float64)
+    value = np.zeros((n_trees, max_nodes), dtype=np.float64)
+    for t, tree in enumerate(trees):
+        n = tree.node_count
+        nodes = np.arange(n)
+        is_leaf = tree.children_left == -1
+        left[t, :n] = np.where(is_leaf, nodes, tree.children_left)
+        right[t, :n] = np.where(is_leaf, nodes, tree.children_right)
+        feature[t, :n] = np.where(is_leaf, 0, tree.feature)
+        threshold[t, :n] = tree.threshold
+        value[t, :n] = tree.value[:, 0, 0]
+    rows = np.arange(n_trees)
+    
+    def predict_forest(house_size, occupants, ac_hours):
+        # Trees are fitted on float32 features, so compare at that precision
+        x = np.array([house_size, occupants, ac_hours], dtype=np.float32).astype(np.float64)
+        node = np.zeros(n_trees, dtype=np.intp)
+        for _ in range(max_depth):
+            go_left = x[feature[rows, node]] <= threshold[rows, node]
+            node = np.where(go_left, left[rows, node], right[rows, node])
+        return float(value[rows, node].mean())
+    
+    return predict_forest
+
+# Fast inference path for ML_MODEL (None falls back to ML_MODEL.predict)
+FAST_PREDICT = build_fast_predictor(ML_MODEL)
+
+# Per-thread (1, 3) input buffer for ML_MODEL.predict; handlers run in the threadpool
+_PRED_BUF = threading.local()
+
+def _prediction_buffer() -> np.ndarray:
+    """Return this thread's reusable (1, 3) float64 input buffer"""
+    buf = getattr(_PRED_BUF, "arr", None)
+    if buf is None:
+        buf = _PRED_BUF.arr = np.empty((1, 3), dtype=np.float64)
+    return buf
+
 def predict_energy_consumption(house_size: float, occupants: int, ac_hours: float) -> Optional[float]:
     """
     Predict energy consumption using ML model
@@ -118,369 +342,387 @@ def predict_energy_consumption(house_size: float, occupants: int, ac_hours: floa
         return None
     
     try:
-        # Prepare input data
-        X = np.array([[house_size, occupants, ac_hours]])
-        prediction = ML_MODEL.predict(X)[0]
+        if FAST_PREDICT is not None:
+            prediction = FAST_PREDICT(house_size, occupants, ac_hours)
+        else:
+            # Fill the reusable input buffer in place
+            X = _prediction_buffer()
+            X[0, 0] = house_size
+            X[0, 1] = occupants
+            X[0, 2] = ac_hours
+            prediction = ML_MODEL.predict(X)[0]
         return max(prediction, 100)  # Minimum 100 kWh
     except Exception as e:
         print(f"⚠️  ML prediction failed: {e}")
         return None
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database tables on startup"""
-    create_tables()
-    print("🌍 Hybrid Carbon Footprint Tracker API started!")
-    print("📊 Emission factors loaded successfully")
-    if ML_MODEL is not None:
-        print("🤖 ML model loaded successfully")
-    else:
-        print("⚠️  ML model not available - using baseline calculations only")
+def warm_ml_model():
+    """Run a dummy prediction so lazy imports don't land on the first real request"""
+    if ML_MODEL is None:
+        return
+    
+    try:
+        ML_MODEL.predict(np.zeros((1, 3), dtype=np.float64))
+        if FAST_PREDICT is not None:
+            FAST_PREDICT(0.0, 1, 0.0)
+    except Exception as e:
+        print(f"⚠️  ML model warm-up failed: {e}")
+
+# Static root payload, serialized once
+_ROOT_BYTES = orjson.dumps({
+    "message": "Hybrid Carbon Footprint Tracker API",
+    "version": "1.0.0",
+    "status": "running"
+})
 
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "message": "Hybrid Carbon Footprint Tracker API",
-        "version": "1.0.0",
-        "status": "running"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    """Health check endpoint (timestamp is Unix epoch seconds)"""
+    return ORJSONResponse({"status": "healthy", "timestamp": time.time()})
+
+class BaselineKey(NamedTuple):
+    """
+    Hashable snapshot of the InputPayload fields the baseline depends on
+    
+    Fields after transport_mode line up with _ACTIVITY_NAMES / ACTIVITY_FACTORS.
+    """
+    commute_km: float
+    transport_mode: str
+    beef_kg: float
+    chicken_kg: float
+    pork_kg: float
+    fish_kg: float
+    dairy_kg: float
+    vegetables_kg: float
+    fruits_kg: float
+    electricity_kwh: float
+    natural_gas_kwh: float
+    waste_kg: float
+    recycled_kg: float
+    clothing_kg: float
+    electronics_items: int
+
+def _baseline_core(payload: BaselineKey) -> Tuple[Dict, Dict, float, Dict]:
+    """
+    Compute the rule-based baseline footprint (uncached, see _calc_core)
+
+    Returns:
+        Tuple of (breakdown, details, baseline_total, aux) where aux holds
+        intermediate totals reused by /api/refine (total_food_kg, total_commute_km)
+    """
+    # Transport depends on the mode, so it stays scalar
+    transport_factor = TRANSPORT_FACTORS.get(payload.transport_mode)
+    has_transport = payload.commute_km > 0 and transport_factor is not None
+    commute = payload.commute_km * transport_factor if has_transport else 0.0
+    
+    # Every other activity in one vector multiply
+    emissions = (np.array(payload[2:], dtype=np.float64) * ACTIVITY_FACTORS).tolist()
+    
+    # Category sums are added left to right in activity order, like the
+    # original per-item loop; a pairwise/vector reduction can round the
+    # total to a different cent
+    category_sums = [sum(emissions[sl]) for _, sl in _CATEGORY_SLICES]
+    
+    # Round every output value in one pass: activities, category sums, commute
+    # (Python's round() rather than np.round(), which scales by 100 first and
+    # can land half a cent off on ties)
+    raw = emissions + category_sums + [commute]
+    rounded = [round(value, 2) for value in raw]
+    n_activities = len(emissions)
+    sums_raw = raw[n_activities:-1]
+    sums_rounded = rounded[n_activities:-1]
+    commute_rounded = rounded[-1]
+    
+    # Category totals; zero categories are left out of the result
+    # (transport is kept even at zero emissions, e.g. cycling)
+    breakdown = {"transport": commute_rounded} if has_transport else {}
+    breakdown.update(
+        (category, total)
+        for (category, _), raw_total, total in zip(_CATEGORY_SLICES, sums_raw, sums_rounded)
+        if raw_total
+    )
+    
+    activity_details = {
+        category: {
+            name: value
+            for name, raw_value, value in zip(_ACTIVITY_NAMES[sl], raw[sl], rounded[sl])
+            if raw_value
+        }
+        for category, sl in _CATEGORY_SLICES
+    }
+    activity_details["transport"] = {
+        "commute": commute_rounded,
+        "mode": payload.transport_mode,
+        "distance_km": payload.commute_km
+    }
+    details = {category: activity_details[category] for category in breakdown}
+    
+    # Calculate total
+    baseline_total = round(sum(breakdown.values(), 0.0), 2)
+    
+    aux = {
+        "total_food_kg": sum(payload[2:9]),  # beef_kg ... fruits_kg
+        "total_commute_km": payload.commute_km
+    }
+    
+    return breakdown, details, baseline_total, aux
+
+@lru_cache(maxsize=4096)
+def _calc_core(payload: BaselineKey) -> Tuple[Dict, Dict, float, Dict]:
+    """
+    Memoized _baseline_core for /api/refine
 
-@app.post("/api/calc", response_model=CalculationResponse)
+    The returned dicts are shared between callers and must not be mutated;
+    use _compute_baseline() for a private copy.
+    """
+    return _baseline_core(payload)
+
+def _baseline_key(payload: InputPayload) -> BaselineKey:
+    """Extract the cache key for _calc_core from a payload"""
+    return BaselineKey(*(getattr(payload, field) for field in BaselineKey._fields))
+
+def _compute_baseline(payload: InputPayload):
+    """
+    Compute the rule-based baseline footprint for a payload
+
+    Returns:
+        Tuple of (breakdown, details, baseline_total, aux); breakdown and
+        details are safe to mutate, aux is shared and read-only
+    """
+    breakdown, details, baseline_total, aux = _calc_core(_baseline_key(payload))
+    return dict(breakdown), {k: dict(v) for k, v in details.items()}, baseline_total, aux
+
+@lru_cache(maxsize=4096)
+def _calc_body_prefix(key: BaselineKey) -> bytes:
+    """
+    Serialized /api/calc body for a payload, minus the per-request timestamp
+    
+    Returns the JSON object up to and including the "timestamp" key, so a
+    repeated payload costs one orjson.dumps() of the current time. Calls the
+    uncached _baseline_core so the dicts aren't also kept in _calc_core's cache.
+    """
+    breakdown, details, baseline_total, _ = _baseline_core(key)
+    body = orjson.dumps({
+        "breakdown": breakdown,
+        "baseline_total": baseline_total,
+        "refined_total": None,
+        "details": details
+    })
+    return body[:-1] + b',"timestamp":'
+
+@app.post("/api/calc", responses={200: {"model": CalculationResponse}})
 @limiter.limit("10/minute")
-async def calculate_footprint(
+def calculate_footprint(
     request: Request,
     payload: InputPayload,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Calculate baseline carbon footprint using rule-based emission factors
+    
+    Returns CalculationResponse-shaped JSON bytes directly, skipping
+    response_model validation of data we just built; identical payloads
+    reuse the serialized body.
     """
-    try:
-        breakdown = {}
-        details = {}
-        
-        # Transport calculation
-        if payload.commute_km > 0:
-            transport_factor = EMISSION_FACTORS["transport"].get(payload.transport_mode, {})
-            if transport_factor:
-                transport_emissions = payload.commute_km * transport_factor["value"]
-                breakdown["transport"] = round(transport_emissions, 2)
-                details["transport"] = {
-                    "commute": round(transport_emissions, 2),
-                    "mode": payload.transport_mode,
-                    "distance_km": payload.commute_km
-                }
-        
-        # Food calculations
-        food_emissions = 0
-        food_details = {}
-        
-        food_items = {
-            "beef": payload.beef_kg,
-            "chicken": payload.chicken_kg,
-            "pork": payload.pork_kg,
-            "fish": payload.fish_kg,
-            "milk": payload.dairy_kg,
-            "vegetables": payload.vegetables_kg,
-            "fruits": payload.fruits_kg
-        }
-        
-        for food_type, amount in food_items.items():
-            if amount > 0:
-                factor = EMISSION_FACTORS["food"].get(food_type, {})
-                if factor:
-                    emissions = amount * factor["value"]
-                    food_emissions += emissions
-                    food_details[food_type] = round(emissions, 2)
-        
-        if food_emissions > 0:
-            breakdown["food"] = round(food_emissions, 2)
-            details["food"] = food_details
-        
-        # Energy calculations
-        energy_emissions = 0
-        energy_details = {}
-        
-        if payload.electricity_kwh > 0:
-            # Use global average emission factor
-            electricity_factor = EMISSION_FACTORS["energy"]["electricity_global_avg"]["value"]
-            electricity_emissions = payload.electricity_kwh * electricity_factor
-            energy_emissions += electricity_emissions
-            energy_details["electricity"] = round(electricity_emissions, 2)
-        
-        if payload.natural_gas_kwh > 0:
-            gas_factor = EMISSION_FACTORS["energy"]["natural_gas"]["value"]
-            gas_emissions = payload.natural_gas_kwh * gas_factor
-            energy_emissions += gas_emissions
-            energy_details["natural_gas"] = round(gas_emissions, 2)
-        
-        if energy_emissions > 0:
-            breakdown["energy"] = round(energy_emissions, 2)
-            details["energy"] = energy_details
-        
-        # Waste calculations
-        waste_emissions = 0
-        waste_details = {}
-        
-        if payload.waste_kg > 0:
-            waste_factor = EMISSION_FACTORS["waste"]["municipal_waste"]["value"]
-            waste_emissions = payload.waste_kg * waste_factor
-            waste_details["landfill"] = round(waste_emissions, 2)
-        
-        if payload.recycled_kg > 0:
-            # Recycling saves emissions (negative value)
-            recycling_saving = payload.recycled_kg * -0.2  # -0.2 kg CO2 per kg recycled
-            waste_emissions += recycling_saving
-            waste_details["recycling_saving"] = round(recycling_saving, 2)
-        
-        if waste_emissions != 0:
-            breakdown["waste"] = round(waste_emissions, 2)
-            details["waste"] = waste_details
-        
-        # Consumption calculations
-        consumption_emissions = 0
-        consumption_details = {}
-        
-        if payload.clothing_kg > 0:
-            clothing_factor = EMISSION_FACTORS["consumption"]["clothing"]["value"]
-            clothing_emissions = payload.clothing_kg * clothing_factor
-            consumption_emissions += clothing_emissions
-            consumption_details["clothing"] = round(clothing_emissions, 2)
-        
-        if payload.electronics_items > 0:
-            # Average smartphone emissions as proxy
-            electronics_factor = EMISSION_FACTORS["consumption"]["electronics_smartphone"]["value"]
-            electronics_emissions = payload.electronics_items * electronics_factor
-            consumption_emissions += electronics_emissions
-            consumption_details["electronics"] = round(electronics_emissions, 2)
-        
-        if consumption_emissions > 0:
-            breakdown["consumption"] = round(consumption_emissions, 2)
-            details["consumption"] = consumption_details
-        
-        # Calculate total
-        baseline_total = round(sum(breakdown.values()), 2)
-        
-        return CalculationResponse(
-            breakdown=breakdown,
-            baseline_total=baseline_total,
-            details=details
-        )
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Calculation failed: {str(e)}"
-        )
+    body = _calc_body_prefix(_baseline_key(payload)) + orjson.dumps(datetime.utcnow()) + b"}"
+    return Response(content=body, media_type="application/json")
 
-@app.post("/api/refine", response_model=CalculationResponse)
-async def refine_footprint(
-    payload: InputPayload,
-    db: Session = Depends(get_db)
+@app.post("/api/refine", responses={200: {"model": CalculationResponse}})
+def refine_footprint(
+    payload: InputPayload
 ):
     """
     Refine carbon footprint calculation using ML model
     """
-    try:
-        # Get baseline calculation
-        baseline_response = await calculate_footprint(payload, db)
-        
-        # Start with baseline breakdown
-        refined_breakdown = baseline_response.breakdown.copy()
-        refined_details = baseline_response.details.copy()
-        
-        # ML refinements
-        ml_insights = []
+    # Get baseline calculation; private copies that are adjusted in place below
+    refined_breakdown, refined_details, baseline_total, aux = _compute_baseline(payload)
+    
+    # ML refinements
+    ml_insights = []
+    
+    # 1. Energy prediction refinement
+    if (payload.house_size is not None and 
+        payload.occupants is not None and 
+        payload.ac_hours is not None):
+        
+        # Predict energy consumption using ML
+        predicted_kwh = predict_energy_consumption(
+            payload.house_size, 
+            payload.occupants, 
+            payload.ac_hours
+        )
         
-        # 1. Energy prediction refinement
-        if (payload.house_size is not None and 
-            payload.occupants is not None and 
-            payload.ac_hours is not None):
+        if predicted_kwh is not None:
+            # Calculate difference between user input and ML prediction
+            user_kwh = payload.electricity_kwh
+            kwh_difference = predicted_kwh - user_kwh
             
-            # Predict energy consumption using ML
-            predicted_kwh = predict_energy_consumption(
-                payload.house_size, 
-                payload.occupants, 
-                payload.ac_hours
-            )
-            
-            if predicted_kwh is not None:
-                # Calculate difference between user input and ML prediction
-                user_kwh = payload.electricity_kwh
-                kwh_difference = predicted_kwh - user_kwh
+            # If ML prediction is significantly different, adjust
+            if abs(kwh_difference) > 50:  # 50 kWh threshold
+                # Calculate new energy emissions
+                new_energy_emissions = predicted_kwh * ELEC_FACTOR
                 
-                # If ML prediction is significantly different, adjust
-                if abs(kwh_difference) > 50:  # 50 kWh threshold
-                    # Calculate new energy emissions
-                    electricity_factor = EMISSION_FACTORS["energy"]["electricity_global_avg"]["value"]
-                    new_energy_emissions = predicted_kwh * electricity_factor
+                # Update energy breakdown
+                if "energy" in refined_breakdown:
+                    refined_breakdown["energy"] = new_energy_emissions
                     
-                    # Update energy breakdown
-                    if "energy" in refined_breakdown:
-                        old_energy = refined_breakdown["energy"]
-                        refined_breakdown["energy"] = new_energy_emissions
-                        
-                        # Update details
-                        if "energy" in refined_details:
-                            refined_details["energy"]["electricity"] = new_energy_emissions
-                        
-                        # Add insight
-                        if kwh_difference > 0:
-                            ml_insights.append(f"ML predicts {kwh_difference:.0f} kWh higher energy usage based on your house size ({payload.house_size}m²) and {payload.occupants} occupants")
-                        else:
-                            ml_insights.append(f"ML predicts {abs(kwh_difference):.0f} kWh lower energy usage based on your house size ({payload.house_size}m²) and {payload.occupants} occupants")
-        
-        # 2. Transportation refinement based on distance patterns
-        if payload.commute_km > 0:
-            # If commute is very high, suggest it might be overestimated
-            if payload.commute_km > 100:  # 100 km daily seems high
-                transport_factor = 0.9  # 10% reduction
-                if "transport" in refined_breakdown:
-                    refined_breakdown["transport"] *= transport_factor
-                    ml_insights.append("ML adjusted transport emissions - daily commute over 100km seems unusually high")
-        
-        # 3. Food consumption refinement
-        total_food_kg = (payload.beef_kg + payload.chicken_kg + payload.pork_kg + 
-                        payload.fish_kg + payload.dairy_kg + payload.vegetables_kg + payload.fruits_kg)
-        
-        if total_food_kg > 20:  # More than 20kg per week seems high
-            food_factor = 0.95  # 5% reduction
-            if "food" in refined_breakdown:
-                refined_breakdown["food"] *= food_factor
-                ml_insights.append("ML adjusted food emissions - consumption over 20kg/week seems high for typical household")
-        
-        # 4. Seasonal and regional adjustments (mock)
-        seasonal_factor = 1.02  # 2% increase for winter energy usage
-        if "energy" in refined_breakdown:
-            refined_breakdown["energy"] *= seasonal_factor
-            ml_insights.append("ML applied seasonal adjustment (+2%) for winter energy usage")
-        
-        # Calculate refined total
-        refined_total = sum(refined_breakdown.values())
-        
-        # Add ML insights to details
-        if ml_insights:
-            refined_details["ml_insights"] = ml_insights
-        
-        return CalculationResponse(
-            breakdown=refined_breakdown,
-            baseline_total=baseline_response.baseline_total,
-            refined_total=refined_total,
-            details=refined_details
-        )
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Refinement failed: {str(e)}"
-        )
+                    # Update details
+                    if "energy" in refined_details:
+                        refined_details["energy"]["electricity"] = new_energy_emissions
+                    
+                    # Add insight
+                    if kwh_difference > 0:
+                        ml_insights.append(f"ML predicts {kwh_difference:.0f} kWh higher energy usage based on your house size ({payload.house_size}m²) and {payload.occupants} occupants")
+                    else:
+                        ml_insights.append(f"ML predicts {abs(kwh_difference):.0f} kWh lower energy usage based on your house size ({payload.house_size}m²) and {payload.occupants} occupants")
+    
+    # 2. Transportation refinement based on distance patterns
+    if aux["total_commute_km"] > 0:
+        # If commute is very high, suggest it might be overestimated
+        if aux["total_commute_km"] > 100:  # 100 km daily seems high
+            transport_factor = 0.9  # 10% reduction
+            if "transport" in refined_breakdown:
+                refined_breakdown["transport"] *= transport_factor
+                ml_insights.append("ML adjusted transport emissions - daily commute over 100km seems unusually high")
+    
+    # 3. Food consumption refinement (weekly food total from the baseline pass)
+    if aux["total_food_kg"] > 20:  # More than 20kg per week seems high
+        food_factor = 0.95  # 5% reduction
+        if "food" in refined_breakdown:
+            refined_breakdown["food"] *= food_factor
+            ml_insights.append("ML adjusted food emissions - consumption over 20kg/week seems high for typical household")
+    
+    # 4. Seasonal and regional adjustments (mock)
+    seasonal_factor = 1.02  # 2% increase for winter energy usage
+    if "energy" in refined_breakdown:
+        refined_breakdown["energy"] *= seasonal_factor
+        ml_insights.append("ML applied seasonal adjustment (+2%) for winter energy usage")
+    
+    # Calculate refined total
+    refined_total = sum(refined_breakdown.values(), 0.0)
+    
+    # Add ML insights to details
+    if ml_insights:
+        refined_details["ml_insights"] = ml_insights
+    
+    return ORJSONResponse({
+        "breakdown": refined_breakdown,
+        "baseline_total": baseline_total,
+        "refined_total": refined_total,
+        "details": refined_details,
+        "timestamp": datetime.utcnow()
+    })
 
-@app.post("/api/offset", response_model=OffsetResponse)
-async def get_offset_recommendations(
-    request: OffsetRequest,
-    db: Session = Depends(get_db)
+# Mock offset projects: (name, type, cost per ton USD, impact template, transaction id, certificate url)
+_OFFSET_PROJECTS = (
+    ("Amazon Rainforest Reforestation", "Reforestation", 15.0,
+     "Plant trees to offset {} kg of CO2 emissions",
+     "0x1234567890abcdef", "https://example.com/certificate/123"),
+    ("Solar Energy Project - India", "Renewable Energy", 25.0,
+     "Support solar energy development to offset {} kg of CO2",
+     "0xabcdef1234567890", "https://example.com/certificate/456"),
+    ("Wind Farm - Texas", "Renewable Energy", 20.0,
+     "Invest in wind energy to offset {} kg of CO2",
+     "0x9876543210fedcba", "https://example.com/certificate/789"),
+)
+_OFFSET_COSTS = np.array([project[2] for project in _OFFSET_PROJECTS], dtype=np.float64)
+
+@lru_cache(maxsize=1024)
+def _offset_recommendations(footprint_kg: float) -> Tuple[Dict, ...]:
+    """Build OffsetRecommendation-shaped dicts for a footprint (memoized, do not mutate)"""
+    total_costs = ((footprint_kg / 1000.0) * _OFFSET_COSTS).tolist()  # Convert kg to tons
+    amount = f"{footprint_kg:.1f}"
+    return tuple(
+        {
+            "project_name": name,
+            "project_type": project_type,
+            "cost_per_ton": cost_per_ton,
+            "total_cost": total_cost,
+            "impact_description": template.format(amount),
+            "transaction_id": transaction_id,
+            "certificate_url": certificate_url
+        }
+        for (name, project_type, cost_per_ton, template, transaction_id, certificate_url), total_cost
+        in zip(_OFFSET_PROJECTS, total_costs)
+    )
+
+@app.post("/api/offset", responses={200: {"model": OffsetResponse}})
+def get_offset_recommendations(
+    request: OffsetRequest
 ):
     """
     Get carbon offset recommendations (mocked blockchain integration)
     """
-    try:
-        footprint_kg = request.footprint_kg
-        if footprint_kg <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Footprint must be greater than 0"
-            )
-        
-        # Mock offset recommendations
-        recommendations = [
-            OffsetRecommendation(
-                project_name="Amazon Rainforest Reforestation",
-                project_type="Reforestation",
-                cost_per_ton=15.0,
-                total_cost=(footprint_kg / 1000) * 15.0,  # Convert kg to tons
-                impact_description=f"Plant trees to offset {footprint_kg:.1f} kg of CO2 emissions",
-                transaction_id="0x1234567890abcdef",
-                certificate_url="https://example.com/certificate/123"
-            ),
-            OffsetRecommendation(
-                project_name="Solar Energy Project - India",
-                project_type="Renewable Energy",
-                cost_per_ton=25.0,
-                total_cost=(footprint_kg / 1000) * 25.0,
-                impact_description=f"Support solar energy development to offset {footprint_kg:.1f} kg of CO2",
-                transaction_id="0xabcdef1234567890",
-                certificate_url="https://example.com/certificate/456"
-            ),
-            OffsetRecommendation(
-                project_name="Wind Farm - Texas",
-                project_type="Renewable Energy",
-                cost_per_ton=20.0,
-                total_cost=(footprint_kg / 1000) * 20.0,
-                impact_description=f"Invest in wind energy to offset {footprint_kg:.1f} kg of CO2",
-                transaction_id="0x9876543210fedcba",
-                certificate_url="https://example.com/certificate/789"
-            )
-        ]
-        
-        return OffsetResponse(
-            recommendations=recommendations,
-            total_footprint=footprint_kg,
-            message=f"Found {len(recommendations)} offset options for {footprint_kg:.1f} kg CO2"
-        )
-        
-    except Exception as e:
+    footprint_kg = request.footprint_kg
+    if footprint_kg <= 0:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Offset recommendations failed: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Footprint must be greater than 0"
         )
+    
+    recommendations = list(_offset_recommendations(footprint_kg))
+    
+    return ORJSONResponse({
+        "recommendations": recommendations,
+        "total_footprint": footprint_kg,
+        "message": f"Found {len(recommendations)} offset options for {footprint_kg:.1f} kg CO2"
+    })
 
-@app.get("/api/entries", response_model=List[EntryResponse])
-async def get_user_entries(
+@app.get("/api/entries", response_class=ORJSONResponse, responses={200: {"model": List[EntryResponse]}})
+def get_user_entries(
     limit: int = 10,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get user's carbon footprint entries
+
+    Rows are serialized straight to ORJSONResponse (same shape as EntryResponse)
+    to skip the Pydantic validation pass on the response.
     """
-    try:
-        entries = db.query(Entry).filter(Entry.user_id == current_user.id).order_by(Entry.date.desc()).limit(limit).all()
-        
-        result = []
-        for entry in entries:
-            activities = []
-            for activity in entry.activities:
-                activities.append({
+    # selectinload fetches all activities in one extra query instead of one per entry;
+    # load_only skips hydrating columns the response does not use
+    # yield_per streams large limits in batches instead of materializing every row at once
+    stmt = (
+        select(Entry)
+        .options(
+            load_only(Entry.id, Entry.date, Entry.baseline_total, Entry.refined_total),
+            selectinload(Entry.activities)
+        )
+        .where(Entry.user_id == current_user.id)
+        .order_by(Entry.date.desc())
+        .limit(limit)
+        .execution_options(yield_per=100)
+    )
+    entries = db.execute(stmt).scalars()
+    
+    result = [
+        {
+            "id": entry.id,
+            "date": entry.date,
+            "baseline_total": entry.baseline_total,
+            "refined_total": entry.refined_total,
+            "activities": [
+                {
                     "category": activity.category,
                     "activity_type": activity.activity_type,
                     "value": activity.value,
                     "unit": activity.unit,
                     "kgco2_baseline": activity.kgco2_baseline,
                     "kgco2_refined": activity.kgco2_refined
-                })
-            
-            result.append(EntryResponse(
-                id=entry.id,
-                date=entry.date,
-                baseline_total=entry.baseline_total,
-                refined_total=entry.refined_total,
-                activities=activities
-            ))
-        
-        return result
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch entries: {str(e)}"
-        )
+                }
+                for activity in entry.activities
+            ]
+        }
+        for entry in entries
+    ]
+    
+    return ORJSONResponse(content=result)
 
 # Authentication endpoints
 @app.post("/auth/register", response_model=TokenResponse)
@@ -600,29 +842,49 @@ async def get_current_user_info(
         monthly_goal=float(current_user.monthly_goal) if current_user.monthly_goal else None
     )
 
+# Leaderboard responses cached per limit: limit -> (expires_at, entries).
+# The cache is per process: with several uvicorn workers, clearing it only
+# affects the worker that served the request, and the others keep serving
+# their copy for up to LEADERBOARD_TTL seconds
+LEADERBOARD_TTL = 30.0  # seconds
+LEADERBOARD_CACHE_SIZE = 8
+_leaderboard_cache: Dict[int, Tuple[float, List[LeaderboardEntry]]] = {}
+
 # Leaderboard endpoint
 @app.get("/api/leaderboard", response_model=List[LeaderboardEntry])
 async def get_leaderboard(
     limit: int = 10,
     db: Session = Depends(get_db)
 ):
-    """Get community leaderboard"""
+    """Get community leaderboard (cached for LEADERBOARD_TTL seconds)"""
+    now = time.monotonic()
+    cached = _leaderboard_cache.get(limit)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    
     try:
-        result = db.execute(
-            select(User).filter(User.leaderboard_opt_in == True)
+        # Only the two columns shown, so the ix_users_opt_total scan needs no User hydration
+        rows = db.execute(
+            select(User.username, User.total_reduced_co2)
+            .where(User.leaderboard_opt_in.is_(True))
             .order_by(desc(User.total_reduced_co2)).limit(limit)
         )
-        users = result.scalars().all()
         
-        return [
+        leaderboard = [
             LeaderboardEntry(
                 rank=i+1,
-                username=user.username,
-                score=float(user.total_reduced_co2)
+                username=username,
+                score=float(total_reduced_co2)
             )
-            for i, user in enumerate(users)
+            for i, (username, total_reduced_co2) in enumerate(rows)
         ]
         
+        if len(_leaderboard_cache) >= LEADERBOARD_CACHE_SIZE:
+            _leaderboard_cache.clear()
+        _leaderboard_cache[limit] = (now + LEADERBOARD_TTL, leaderboard)
+        
+        return leaderboard
+        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -631,25 +893,12 @@ async def get_leaderboard(
 
 # Suggestions endpoint
 @app.post("/api/suggest", response_model=SuggestionsResponse)
-async def get_suggestions(
+def get_suggestions(
     request_data: SuggestionRequest,
     current_user: User = Depends(get_current_user)
 ):
     """Get personalized carbon reduction suggestions"""
     try:
-        # Load suggestion rules (safe fallback if missing)
-        rules_path = Path(__file__).parent.parent / "shared" / "suggestion_rules.json"
-        if rules_path.exists():
-            with open(rules_path, 'r') as f:
-                rules = json.load(f)
-        else:
-            # Minimal defaults if rules file is not present
-            rules = {
-                "energy": {"threshold": 0.25, "tips": [{"tip": "Improve home insulation and switch to LEDs", "savings": 15.0, "impact_level": "high"}]},
-                "transport": {"threshold": 0.3, "tips": [{"tip": "Carpool or use public transport twice a week", "savings": 12.0, "impact_level": "medium"}]},
-                "food": {"threshold": 0.2, "tips": [{"tip": "Try one vegetarian day per week", "savings": 8.0, "impact_level": "low"}]}
-            }
-        
         suggestions = []
         total_potential_savings = 0
         
@@ -662,21 +911,22 @@ async def get_suggestions(
                 total_potential_savings=0
             )
         
-        for category, emissions in breakdown.items():
-            if category in rules and emissions > 0:
-                category_ratio = emissions / total_emissions
-                threshold = rules[category]["threshold"]
-                
-                if category_ratio > threshold:
-                    # Get the best tip for this category
-                    best_tip = rules[category]["tips"][0]  # First tip is usually the highest impact
-                    suggestions.append(SuggestionResponse(
-                        category=category,
-                        tip=best_tip["tip"],
-                        savings=best_tip["savings"],
-                        impact_level=best_tip["impact_level"]
-                    ))
-                    total_potential_savings += best_tip["savings"]
+        # Compare every ruled category's share against its threshold in one pass,
+        # keeping the breakdown's category order
+        categories = [category for category in breakdown if category in RULE_INDEX]
+        rows = np.array([RULE_INDEX[category] for category in categories], dtype=np.intp)
+        emissions = np.array([breakdown[category] for category in categories], dtype=np.float64)
+        matched = (emissions > 0) & (emissions / total_emissions > RULE_THRESHOLDS[rows])
+        
+        for i in np.flatnonzero(matched):
+            best_tip = RULE_TIPS[rows[i]]
+            suggestions.append(SuggestionResponse(
+                category=categories[i],
+                tip=best_tip["tip"],
+                savings=best_tip["savings"],
+                impact_level=best_tip["impact_level"]
+            ))
+            total_potential_savings += best_tip["savings"]
         
         # Limit to top 5 suggestions
         suggestions = suggestions[:5]
@@ -702,13 +952,21 @@ async def update_user_preferences(
 ):
     """Update user preferences"""
     try:
+        # Partial UPDATE of only the provided columns
+        values = {}
         if leaderboard_opt_in is not None:
-            current_user.leaderboard_opt_in = leaderboard_opt_in
+            values["leaderboard_opt_in"] = leaderboard_opt_in
         
         if monthly_goal is not None:
-            current_user.monthly_goal = monthly_goal
+            values["monthly_goal"] = monthly_goal
         
-        db.commit()
+        if values:
+            db.execute(update(User).where(User.id == current_user.id).values(**values))
+            db.commit()
+        
+        if leaderboard_opt_in is not None:
+            # Best-effort: only this worker's cache, others expire via the TTL
+            _leaderboard_cache.clear()
         
         return {"message": "Preferences updated successfully"}
         
@@ -720,4 +978,14 @@ async def update_user_preferences(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Create the tables once up front; otherwise every worker's lifespan races
+    # to CREATE them on a fresh database ("table users already exists")
+    create_tables()
+    # Multiple workers require the app as an import string; loop/http stay
+    # "auto", which picks uvloop/httptools whenever they are installed
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=os.cpu_count() or 1
+    )
\ No newline at end of file
@@ -2,7 +2,7 @@
 Database models for Hybrid Carbon Footprint Tracker
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Numeric, Index, Uuid
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -10,10 +10,14 @@ import uuid
 
 Base = declarative_base()
 
+# User ids: native 16-byte uuid on PostgreSQL, the dashed uuid4 string
+# elsewhere (SQLite has no UUID type); str on the Python side either way
+UserId = String().with_variant(Uuid(as_uuid=False), "postgresql")
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(UserId, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     email = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -27,15 +31,21 @@ class User(Base):
     monthly_goal = Column(Numeric(10, 2), nullable=True)
     last_entry_date = Column(DateTime, nullable=True)
     
-    # Relationships
-    entries = relationship("Entry", back_populates="user")
-    suggestions_log = relationship("SuggestionLog", back_populates="user")
+    # Relationships (collections must be eager-loaded explicitly, e.g. with
+    # selectinload(), so serializing them can't fall into N+1 lazy loads)
+    entries = relationship("Entry", back_populates="user", lazy="raise_on_sql")
+    suggestions_log = relationship("SuggestionLog", back_populates="user", lazy="raise_on_sql")
+    
+    # Serves the opted-in leaderboard ordered by total_reduced_co2
+    __table_args__ = (
+        Index("ix_users_opt_total", leaderboard_opt_in, total_reduced_co2),
+    )
 
 class Entry(Base):
     __tablename__ = "entries"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"))
+    user_id = Column(UserId, ForeignKey("users.id"))
     date = Column(DateTime, default=datetime.utcnow)
     baseline_total = Column(Float, nullable=False)
     refined_total = Column(Float, nullable=True)
@@ -43,7 +53,12 @@ class Entry(Base):
     
     # Relationships
     user = relationship("User", back_populates="entries")
-    activities = relationship("Activity", back_populates="entry")
+    activities = relationship("Activity", back_populates="entry", lazy="raise_on_sql")
+    
+    # Serves "latest entries for a user" (/api/entries) as an index range scan
+    __table_args__ = (
+        Index("ix_entries_user_date", user_id, date.desc()),
+    )
 
 class Activity(Base):
     __tablename__ = "activities"
@@ -64,7 +79,7 @@ class SuggestionLog(Base):
     __tablename__ = "suggestions_log"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"))
+    user_id = Column(UserId, ForeignKey("users.id"))
     tip_id = Column(String(100), nullable=False)  # Unique identifier for the tip
     category = Column(String(50), nullable=False)  # transport, food, energy, etc.
     tip_text = Column(Text, nullable=False)
@@ -73,3 +88,8 @@ class SuggestionLog(Base):
     
     # Relationships
     user = relationship("User", back_populates="suggestions_log")
+    
+    # Serves "tips applied by a user" ordered by date
+    __table_args__ = (
+        Index("ix_suggestions_log_user_date", user_id, applied_date.desc()),
+    )
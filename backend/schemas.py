@@ -2,59 +2,53 @@
 Pydantic schemas for API requests and responses
 """
 
-from pydantic import BaseModel, Field, validator
-from typing import Dict, List, Optional, Any
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Literal, Optional, Union, Any
 from datetime import datetime
 
+# Shared non-negative constraints, built once and reused by every field
+NonNegFloat = Annotated[float, Field(ge=0)]
+NonNegInt = Annotated[int, Field(ge=0)]
+
+# Validated by pydantic-core itself, no Python validator runs per request
+TransportMode = Literal[
+    "car_petrol", "car_diesel", "car_hybrid", "car_ev",
+    "bus_diesel", "bus_electric", "train_diesel", "train_electric",
+    "motorcycle", "bicycle", "walking", "airplane_shorthaul", "airplane_longhaul"
+]
+
 class InputPayload(BaseModel):
     """User input data for carbon footprint calculation"""
     
     # Transport
-    commute_km: float = Field(0, ge=0, description="Daily commute distance in km")
-    transport_mode: str = Field("car_petrol", description="Transport mode")
+    commute_km: NonNegFloat = Field(0, description="Daily commute distance in km")
+    transport_mode: TransportMode = Field("car_petrol", description="Transport mode")
     
     # Food consumption (kg per week)
-    beef_kg: float = Field(0, ge=0, description="Beef consumption in kg per week")
-    chicken_kg: float = Field(0, ge=0, description="Chicken consumption in kg per week")
-    pork_kg: float = Field(0, ge=0, description="Pork consumption in kg per week")
-    fish_kg: float = Field(0, ge=0, description="Fish consumption in kg per week")
-    dairy_kg: float = Field(0, ge=0, description="Dairy consumption in kg per week")
-    vegetables_kg: float = Field(0, ge=0, description="Vegetables consumption in kg per week")
-    fruits_kg: float = Field(0, ge=0, description="Fruits consumption in kg per week")
+    beef_kg: NonNegFloat = Field(0, description="Beef consumption in kg per week")
+    chicken_kg: NonNegFloat = Field(0, description="Chicken consumption in kg per week")
+    pork_kg: NonNegFloat = Field(0, description="Pork consumption in kg per week")
+    fish_kg: NonNegFloat = Field(0, description="Fish consumption in kg per week")
+    dairy_kg: NonNegFloat = Field(0, description="Dairy consumption in kg per week")
+    vegetables_kg: NonNegFloat = Field(0, description="Vegetables consumption in kg per week")
+    fruits_kg: NonNegFloat = Field(0, description="Fruits consumption in kg per week")
     
     # Energy
-    electricity_kwh: float = Field(0, ge=0, description="Monthly electricity usage in kWh")
-    natural_gas_kwh: float = Field(0, ge=0, description="Monthly natural gas usage in kWh")
+    electricity_kwh: NonNegFloat = Field(0, description="Monthly electricity usage in kWh")
+    natural_gas_kwh: NonNegFloat = Field(0, description="Monthly natural gas usage in kWh")
     
     # Waste
-    waste_kg: float = Field(0, ge=0, description="Weekly waste in kg")
-    recycled_kg: float = Field(0, ge=0, description="Weekly recycled waste in kg")
+    waste_kg: NonNegFloat = Field(0, description="Weekly waste in kg")
+    recycled_kg: NonNegFloat = Field(0, description="Weekly recycled waste in kg")
     
     # Consumption
-    clothing_kg: float = Field(0, ge=0, description="Monthly clothing purchases in kg")
-    electronics_items: int = Field(0, ge=0, description="Monthly electronics purchases")
+    clothing_kg: NonNegFloat = Field(0, description="Monthly clothing purchases in kg")
+    electronics_items: NonNegInt = Field(0, description="Monthly electronics purchases")
     
     # Optional ML features
-    house_size: Optional[float] = Field(None, ge=0, description="House size in square meters")
+    house_size: Optional[NonNegFloat] = Field(None, description="House size in square meters")
     occupants: Optional[int] = Field(None, ge=1, description="Number of occupants")
-    ac_hours: Optional[float] = Field(None, ge=0, le=24, description="Daily AC usage hours")
-    
-    @validator("commute_km", "electricity_kwh", "beef_kg", "waste_kg")
-    def check_non_negative(cls, v):
-        if v < 0:
-            raise ValueError("Value cannot be negative")
-        return v
-    
-    @validator("transport_mode")
-    def check_transport_mode(cls, v):
-        valid_modes = [
-            "car_petrol", "car_diesel", "car_hybrid", "car_ev",
-            "bus_diesel", "bus_electric", "train_diesel", "train_electric",
-            "motorcycle", "bicycle", "walking", "airplane_shorthaul", "airplane_longhaul"
-        ]
-        if v not in valid_modes:
-            raise ValueError(f"Invalid transport mode. Must be one of: {', '.join(valid_modes)}")
-        return v
+    ac_hours: Optional[NonNegFloat] = Field(None, le=24, description="Daily AC usage hours")
 
 class CalculationResponse(BaseModel):
     """Response for carbon footprint calculation"""
@@ -62,8 +56,9 @@ class CalculationResponse(BaseModel):
     breakdown: Dict[str, float] = Field(description="CO2 emissions breakdown by category")
     baseline_total: float = Field(description="Total baseline CO2 emissions in kg")
     refined_total: Optional[float] = Field(None, description="Total refined CO2 emissions in kg")
-    # Allow details to include strings or numbers (e.g., transport mode)
-    details: Dict[str, Dict[str, Any]] = Field(description="Detailed breakdown by activity")
+    # Per-category dicts of numbers plus strings (e.g., transport mode),
+    # and the ml_insights list of messages added by /api/refine
+    details: Dict[str, Union[Dict[str, Union[float, str]], List[str]]] = Field(description="Detailed breakdown by activity")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class OffsetRecommendation(BaseModel):
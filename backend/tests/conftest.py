@@ -0,0 +1,8 @@
+"""
+Test configuration: make the backend modules (main, database, ...) importable
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
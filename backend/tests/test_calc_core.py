@@ -0,0 +1,132 @@
+"""
+Regression test: _calc_core against the original per-item /api/calc formula
+"""
+
+import random
+
+import pytest
+
+import main
+from main import BaselineKey, _calc_core
+
+def original_baseline(payload):
+    """
+    The per-item loop /api/calc used before vectorization, verbatim apart from
+    returning (breakdown, details, baseline_total) instead of a response model
+    """
+    EMISSION_FACTORS = main.EMISSION_FACTORS
+    breakdown = {}
+    details = {}
+
+    if payload.commute_km > 0:
+        transport_factor = EMISSION_FACTORS["transport"].get(payload.transport_mode, {})
+        if transport_factor:
+            transport_emissions = payload.commute_km * transport_factor["value"]
+            breakdown["transport"] = round(transport_emissions, 2)
+            details["transport"] = {
+                "commute": round(transport_emissions, 2),
+                "mode": payload.transport_mode,
+                "distance_km": payload.commute_km
+            }
+
+    food_emissions = 0
+    food_details = {}
+    food_items = {
+        "beef": payload.beef_kg,
+        "chicken": payload.chicken_kg,
+        "pork": payload.pork_kg,
+        "fish": payload.fish_kg,
+        "milk": payload.dairy_kg,
+        "vegetables": payload.vegetables_kg,
+        "fruits": payload.fruits_kg
+    }
+    for food_type, amount in food_items.items():
+        if amount > 0:
+            factor = EMISSION_FACTORS["food"].get(food_type, {})
+            if factor:
+                emissions = amount * factor["value"]
+                food_emissions += emissions
+                food_details[food_type] = round(emissions, 2)
+    if food_emissions > 0:
+        breakdown["food"] = round(food_emissions, 2)
+        details["food"] = food_details
+
+    energy_emissions = 0
+    energy_details = {}
+    if payload.electricity_kwh > 0:
+        electricity_emissions = payload.electricity_kwh * EMISSION_FACTORS["energy"]["electricity_global_avg"]["value"]
+        energy_emissions += electricity_emissions
+        energy_details["electricity"] = round(electricity_emissions, 2)
+    if payload.natural_gas_kwh > 0:
+        gas_emissions = payload.natural_gas_kwh * EMISSION_FACTORS["energy"]["natural_gas"]["value"]
+        energy_emissions += gas_emissions
+        energy_details["natural_gas"] = round(gas_emissions, 2)
+    if energy_emissions > 0:
+        breakdown["energy"] = round(energy_emissions, 2)
+        details["energy"] = energy_details
+
+    waste_emissions = 0
+    waste_details = {}
+    if payload.waste_kg > 0:
+        waste_emissions = payload.waste_kg * EMISSION_FACTORS["waste"]["municipal_waste"]["value"]
+        waste_details["landfill"] = round(waste_emissions, 2)
+    if payload.recycled_kg > 0:
+        recycling_saving = payload.recycled_kg * -0.2
+        waste_emissions += recycling_saving
+        waste_details["recycling_saving"] = round(recycling_saving, 2)
+    if waste_emissions != 0:
+        breakdown["waste"] = round(waste_emissions, 2)
+        details["waste"] = waste_details
+
+    consumption_emissions = 0
+    consumption_details = {}
+    if payload.clothing_kg > 0:
+        clothing_emissions = payload.clothing_kg * EMISSION_FACTORS["consumption"]["clothing"]["value"]
+        consumption_emissions += clothing_emissions
+        consumption_details["clothing"] = round(clothing_emissions, 2)
+    if payload.electronics_items > 0:
+        electronics_emissions = payload.electronics_items * EMISSION_FACTORS["consumption"]["electronics_smartphone"]["value"]
+        consumption_emissions += electronics_emissions
+        consumption_details["electronics"] = round(electronics_emissions, 2)
+    if consumption_emissions > 0:
+        breakdown["consumption"] = round(consumption_emissions, 2)
+        details["consumption"] = consumption_details
+
+    return breakdown, details, round(sum(breakdown.values()), 2)
+
+def _random_key(rnd, modes):
+    """Random BaselineKey mixing zeros, short decimals and long floats"""
+    def value():
+        return rnd.choice([0, 0, round(rnd.uniform(0, 50), rnd.choice([0, 1, 2, 3])), rnd.uniform(0, 500)])
+    fields = {field: value() for field in BaselineKey._fields if field not in ("transport_mode", "electronics_items")}
+    return BaselineKey(**fields, transport_mode=rnd.choice(modes), electronics_items=rnd.choice([0, 0, 1, 2, 5]))
+
+def _assert_matches_original(key):
+    breakdown, details, baseline_total, _ = _calc_core(key)
+    expected_breakdown, expected_details, expected_total = original_baseline(key)
+    # Compare key order too; dict == ignores it but the JSON body does not
+    assert list(breakdown.items()) == list(expected_breakdown.items()), key
+    assert [(k, list(v.items())) for k, v in details.items()] == \
+        [(k, list(v.items())) for k, v in expected_details.items()], key
+    assert baseline_total == expected_total, key
+
+def test_calc_core_reported_food_rounding_case():
+    # np.add.reduceat summed this food total to 771.0 (total 1832.99)
+    key = BaselineKey(
+        commute_km=0, transport_mode="car_petrol",
+        beef_kg=5.142, chicken_kg=27.15, pork_kg=35.58, fish_kg=0, dairy_kg=2.0,
+        vegetables_kg=46.28, fruits_kg=16.0, electricity_kwh=0, natural_gas_kwh=30.072,
+        waste_kg=0, recycled_kg=0, clothing_kg=48.998, electronics_items=1
+    )
+    _assert_matches_original(key)
+    breakdown, _, baseline_total, _ = _calc_core(key)
+    assert breakdown["food"] == 770.99
+    assert baseline_total == 1832.98
+
+@pytest.mark.parametrize("seed", range(4))
+def test_calc_core_matches_original_formula(seed):
+    # Unknown modes ("boat") must drop transport like the original did
+    modes = list(main.EMISSION_FACTORS["transport"]) + ["boat"]
+    rnd = random.Random(seed)
+    for _ in range(5000):
+        _assert_matches_original(_random_key(rnd, modes))
@@ -0,0 +1,86 @@
+"""
+Parity of build_fast_predictor's compiled kernels with model.predict
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    AdaBoostRegressor,
+    BaggingRegressor,
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge
+
+from main import ML_MODEL, FAST_PREDICT, build_fast_predictor
+
+def _training_data(n_features=3, n_samples=400, seed=0):
+    """Synthetic (house_size, occupants, ac_hours)-shaped training set"""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(30, 400, n_samples),
+        rng.integers(1, 8, n_samples),
+        rng.uniform(0, 24, n_samples),
+    ] + [rng.uniform(0, 1, n_samples) for _ in range(n_features - 3)])
+    y = 1.5 * X[:, 0] + 40 * X[:, 1] + 12 * X[:, 2] + rng.normal(0, 25, n_samples)
+    return X, y
+
+def _query_points(X, seed=1):
+    """Random inputs plus the training rows themselves (exact split thresholds)"""
+    rng = np.random.default_rng(seed)
+    random = np.column_stack([
+        rng.uniform(0, 500, 300),
+        rng.integers(0, 10, 300),
+        rng.uniform(0, 30, 300),
+    ])
+    return np.vstack([random, X[:100, :3]])
+
+@pytest.mark.parametrize("model", [
+    LinearRegression(),
+    Ridge(alpha=1.0),
+    Lasso(alpha=0.5),
+    ElasticNet(alpha=0.5),
+    RandomForestRegressor(n_estimators=20, random_state=0),
+    RandomForestRegressor(n_estimators=10, max_depth=4, random_state=0),
+    ExtraTreesRegressor(n_estimators=20, random_state=0),
+], ids=lambda model: type(model).__name__)
+def test_fast_predictor_matches_model_predict(model):
+    X, y = _training_data()
+    model.fit(X, y)
+    fast = build_fast_predictor(model)
+    assert fast is not None
+
+    points = _query_points(X)
+    expected = model.predict(points)
+    actual = [fast(house_size, occupants, ac_hours) for house_size, occupants, ac_hours in points]
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize("model, n_features", [
+    (AdaBoostRegressor(n_estimators=10, random_state=0), 3),
+    (BaggingRegressor(max_features=2, n_estimators=10, random_state=0), 3),
+    (GradientBoostingRegressor(n_estimators=10, random_state=0), 3),
+    (LinearRegression(), 4),
+    (RandomForestRegressor(n_estimators=5, random_state=0), 4),
+], ids=lambda param: type(param).__name__ if not isinstance(param, int) else f"{param}features")
+def test_fast_predictor_rejects_unsupported_models(model, n_features):
+    X, y = _training_data(n_features=n_features)
+    model.fit(X, y)
+    assert build_fast_predictor(model) is None
+
+def test_fast_predictor_rejects_multi_output_models():
+    X, y = _training_data()
+    Y = np.column_stack([y, -y])
+    assert build_fast_predictor(LinearRegression().fit(X, Y)) is None
+    assert build_fast_predictor(RandomForestRegressor(n_estimators=5, random_state=0).fit(X, Y)) is None
+
+def test_shipped_model_fast_path_matches_model_predict():
+    if ML_MODEL is None:
+        pytest.skip("ml/elec_predictor.pkl not available")
+    assert FAST_PREDICT is not None
+
+    X, _ = _training_data()
+    points = _query_points(X)
+    expected = ML_MODEL.predict(points)
+    actual = [FAST_PREDICT(house_size, occupants, ac_hours) for house_size, occupants, ac_hours in points]
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
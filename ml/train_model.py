@@ -3,19 +3,26 @@
 ML Training Script for Energy Prediction Model
 Hybrid Carbon Footprint Tracker
 
-This script trains a RandomForestRegressor to predict household energy consumption
-based on house size, number of occupants, and AC usage hours.
+This script trains a LinearRegression model to predict household energy consumption
+based on house size, number of occupants, and AC usage hours. The synthetic target
+is affine in the features, so a linear model fits it as well as a forest while
+being a few hundred bytes on disk and a single dot product to evaluate.
 """
 
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, r2_score
-import joblib
 import os
+import threading
+from functools import lru_cache
 from pathlib import Path
 
+DEFAULT_MODEL_PATH = str(Path(__file__).parent / "elec_predictor.pkl")
+
+# Column order of the generated data: three features, then the target
+COLUMNS = ("house_size", "occupants", "ac_hours", "monthly_kwh")
+
+# Per-thread (1, 3) input row reused by predict_energy()
+_input_buffer = threading.local()
+
 def generate_synthetic_data(n_samples=1000, random_state=42):
     """
     Generate synthetic dataset for energy prediction training.
@@ -28,41 +35,50 @@ def generate_synthetic_data(n_samples=1000, random_state=42):
     Target:
     - monthly_kwh: Monthly energy consumption in kWh
     Formula: 200 + (house_size * 2) + (occupants * 50) + noise
+    
+    Returns:
+        float32 array of shape (n_samples, 4), columns in COLUMNS order
     """
-    np.random.seed(random_state)
+    rng = np.random.default_rng(random_state)
+    
+    # One float32 buffer, one column per feature plus the target
+    data = np.empty((n_samples, 4), dtype=np.float32)
+    house_size, occupants, ac_hours, monthly_kwh = data.T
     
     # Generate features
-    house_size = np.random.uniform(50, 300, n_samples)
-    occupants = np.random.randint(1, 6, n_samples)
-    ac_hours = np.random.uniform(0, 24, n_samples)
-    
-    # Generate target with realistic formula + noise
-    base_consumption = 200 + (house_size * 2) + (occupants * 50) + (ac_hours * 2)
-    noise = np.random.normal(0, 50, n_samples)  # 50 kWh standard deviation
-    monthly_kwh = np.maximum(base_consumption + noise, 100)  # Minimum 100 kWh
-    
-    # Create DataFrame
-    data = pd.DataFrame({
-        'house_size': house_size,
-        'occupants': occupants,
-        'ac_hours': ac_hours,
-        'monthly_kwh': monthly_kwh
-    })
+    house_size[:] = rng.uniform(50, 300, n_samples)
+    occupants[:] = rng.integers(1, 6, n_samples)
+    ac_hours[:] = rng.uniform(0, 24, n_samples)
+    
+    # Generate target with realistic formula + noise, accumulated in place
+    np.multiply(house_size, 2, out=monthly_kwh)
+    monthly_kwh += 200
+    monthly_kwh += occupants * 50
+    monthly_kwh += ac_hours * 2
+    monthly_kwh += rng.normal(0, 50, n_samples)  # 50 kWh standard deviation
+    np.maximum(monthly_kwh, 100, out=monthly_kwh)  # Minimum 100 kWh
     
     return data
 
 def train_energy_model():
     """Train and save the energy prediction model."""
+    # Training-only dependencies, imported here so predict_energy() callers
+    # don't pay for loading them
+    import joblib
+    from sklearn.linear_model import LinearRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_absolute_error, r2_score
     
     print("🌱 Generating synthetic training data...")
     data = generate_synthetic_data(n_samples=1000)
     
     print(f"📊 Dataset shape: {data.shape}")
-    print(f"📈 Energy consumption range: {data['monthly_kwh'].min():.1f} - {data['monthly_kwh'].max():.1f} kWh")
     
-    # Prepare features and target
-    X = data[['house_size', 'occupants', 'ac_hours']]
-    y = data['monthly_kwh']
+    # Prepare features and target (views into the same buffer)
+    X = data[:, :3]
+    y = data[:, 3]
+    
+    print(f"📈 Energy consumption range: {y.min():.1f} - {y.max():.1f} kWh")
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -72,16 +88,9 @@ def train_energy_model():
     print(f"🔧 Training set: {X_train.shape[0]} samples")
     print(f"🧪 Test set: {X_test.shape[0]} samples")
     
-    # Train RandomForest model
-    print("🤖 Training RandomForestRegressor...")
-    model = RandomForestRegressor(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    )
+    # Train linear model
+    print("🤖 Training LinearRegression...")
+    model = LinearRegression()
     
     model.fit(X_train, y_train)
     
@@ -94,28 +103,35 @@ def train_energy_model():
     print(f"   Mean Absolute Error: {mae:.2f} kWh")
     print(f"   R² Score: {r2:.3f}")
     
-    # Feature importance
-    feature_importance = pd.DataFrame({
-        'feature': X.columns,
-        'importance': model.feature_importances_
-    }).sort_values('importance', ascending=False)
-    
-    print(f"🎯 Feature Importance:")
-    for _, row in feature_importance.iterrows():
-        print(f"   {row['feature']}: {row['importance']:.3f}")
+    # Fitted coefficients (kWh per unit of each feature)
+    print(f"🎯 Coefficients:")
+    for feature, coef in zip(COLUMNS, model.coef_):
+        print(f"   {feature}: {coef:.3f}")
+    print(f"   intercept: {model.intercept_:.3f}")
     
     # Save model
-    model_path = Path(__file__).parent / "elec_predictor.pkl"
+    model_path = DEFAULT_MODEL_PATH
     joblib.dump(model, model_path)
+    load_model.cache_clear()
     print(f"💾 Model saved to: {model_path}")
     
     # Save training data for reference
     data_path = Path(__file__).parent / "training_data.csv"
-    data.to_csv(data_path, index=False)
+    np.savetxt(data_path, data, fmt="%s", delimiter=",", header=",".join(COLUMNS), comments="")
     print(f"📁 Training data saved to: {data_path}")
     
     return model, mae, r2
 
+@lru_cache(maxsize=4)
+def load_model(model_path):
+    """Load a saved model once per path and reuse it across predictions."""
+    import joblib
+    
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at {model_path}. Please run train_energy_model() first.")
+    
+    return joblib.load(model_path)
+
 def predict_energy(house_size, occupants, ac_hours, model_path=None):
     """
     Predict energy consumption for given inputs.
@@ -129,16 +145,13 @@ def predict_energy(house_size, occupants, ac_hours, model_path=None):
     Returns:
         Predicted monthly energy consumption in kWh
     """
-    if model_path is None:
-        model_path = Path(__file__).parent / "elec_predictor.pkl"
-    
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found at {model_path}. Please run train_energy_model() first.")
-    
-    model = joblib.load(model_path)
+    model = load_model(DEFAULT_MODEL_PATH if model_path is None else str(model_path))
     
-    # Prepare input data
-    X = np.array([[house_size, occupants, ac_hours]])
+    # Prepare input data in this thread's preallocated row (no DataFrame)
+    X = getattr(_input_buffer, "row", None)
+    if X is None:
+        X = _input_buffer.row = np.empty((1, 3), dtype=np.float64)
+    X[0] = (house_size, occupants, ac_hours)
     prediction = model.predict(X)[0]
     
     return prediction